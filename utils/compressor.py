@@ -19,68 +19,193 @@ Usage:
 import sys
 import os
 import subprocess
+import tempfile
 import time
 import json
 import argparse
 import re
-import glob
+import shutil
 from pathlib import Path
 from typing import Dict, Optional, Tuple, List
-from concurrent.futures import ThreadPoolExecutor, as_completed
-import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Crystal clear ffmpeg settings. CrystalClearCompressor builds its per-instance
+# options from these; the instance itself is pickled to a worker process with
+# every bulk batch, which is cheap since it only holds short lists and strings.
+DENOISE_FILTER = 'afftdn=nf=-25'
+
+
+def build_audio_filters(denoise_filter: str = DENOISE_FILTER) -> str:
+    """Build the crystal clear filter chain around the given noise reduction filter"""
+    return f'highpass=f=80,{denoise_filter},equalizer=f=2500:t=h:w=800:g=2'
+
+
+AUDIO_FILTERS = build_audio_filters()
+
+
+def escape_filter_argument(value: str) -> str:
+    """
+    Escape a value for use as a filter option inside an ffmpeg filtergraph.
+    
+    ffmpeg parses it twice: once as a filter option value (special: \\ ' :)
+    and once as part of the filtergraph description (special: \\ ' [ ] , ;).
+    """
+    for special in ('\\', "'", ':'):
+        value = value.replace(special, '\\' + special)
+    for special in ('\\', "'", '[', ']', ',', ';'):
+        value = value.replace(special, '\\' + special)
+    return value
+
+COMMON_OPTIONS = [
+    '-threads', '1',               # One encoder thread; parallelism comes from worker processes
+    '-vn',                         # Skip embedded cover art instead of decoding and re-encoding it
+    '-ac', '1',                    # Convert to mono
+]
+
+# Supported output formats. Each one passes an explicit muxer (-f), since ffmpeg
+# writes to a .part temp path and can't infer the format from the extension.
+# MP3 is the default because the web player, build.js and the hosted content
+# all expect .mp3 files.
+OUTPUT_FORMATS = {
+    'mp3': {
+        'extension': '.mp3',
+        'options': [
+            '-q:a', '3',           # Variable bitrate, high quality (3 = ~170-210 kbps range)
+            '-ar', '22050',        # Sample rate optimized for speech
+            '-f', 'mp3',
+        ],
+        'description': [
+            'Variable bitrate (q:a 3) for high quality',
+            '22050 Hz sample rate (speech optimized)',
+        ],
+        # Inputs already matching these are copied in bulk mode instead of re-encoded
+        'target': {
+            'codec_name': 'mp3',
+            'channels': 1,
+            'sample_rate': 22050,
+            'max_bit_rate': 220000,
+        },
+    },
+    'opus': {
+        'extension': '.opus',
+        'options': [
+            '-c:a', 'libopus',
+            '-b:a', '24k',         # 24 kbps VBR is transparent for mono speech
+            '-vbr', 'on',
+            '-application', 'voip',  # Encoder tuning for speech intelligibility
+            '-ar', '16000',        # Wideband speech sample rate
+            '-f', 'ogg',
+        ],
+        'description': [
+            'Opus 24 kbps variable bitrate (speech tuned)',
+            '16000 Hz sample rate (wideband speech)',
+        ],
+    },
+}
+
+# Global ffmpeg options: no per-frame progress and only real errors on stderr
+FFMPEG_LOG_OPTIONS = ['-nostats', '-loglevel', 'error']
+
+# Suffix of the temporary file ffmpeg writes to before it is renamed into place,
+# so an interrupted encode never leaves a truncated file at the final path
+PARTIAL_SUFFIX = '.part'
+
+# Maximum number of stderr characters kept in error messages
+ERROR_TAIL_CHARS = 2000
+
+# Maximum number of files encoded by a single ffmpeg process in bulk mode
+BATCH_SIZE = 8
+
+# Patterns used by extract_base_name, compiled once since it runs for every file
+_BASENAME_RE = re.compile(r'([A-Za-z]+)')
+_TRAILING_DIGITS_RE = re.compile(r'\d+$')
+
+# (unit, divisor) pairs used by format_file_size
+_SIZE_UNITS = (('B', 1), ('KB', 1024), ('MB', 1024 ** 2), ('GB', 1024 ** 3))
+
+# Bulk task tuple, built by bulk_compress only for files that need processing:
+# (input_file, output_file, filename, base_name, file_index, total_files, input_size)
+FileTask = Tuple[str, str, str, str, int, int, int]
+
+# Explanation of filters:
+# highpass=f=80     : Remove low-frequency noise below 80Hz (rumble, AC noise)
+# afftdn=nf=-25     : Spectral noise reduction with -25dB noise floor
+#                     (or arnndn=m=<model> : RNNoise neural noise reduction, when a model is given)
+# equalizer=f=2500:t=h:w=800:g=2 : Boost 2.5kHz frequency (speech clarity) by 2dB with 800Hz width
 
 class CrystalClearCompressor:
     """
     Audio compressor using crystal clear variable bitrate settings optimized for speech.
     """
     
-    def __init__(self):
-        self.ffmpeg_options = [
-            '-ac', '1',                    # Convert to mono
-            '-q:a', '3',                   # Variable bitrate, high quality (3 = ~170-210 kbps range)
-            '-ar', '22050',                # Sample rate optimized for speech
-            '-af', 'highpass=f=80,afftdn=nf=-25,equalizer=f=2500:t=h:w=800:g=2'
-        ]
+    def __init__(self, rnnoise_model: Optional[str] = None, output_format: str = 'mp3',
+                 reuse_compressed: bool = False):
+        """
+        Args:
+            rnnoise_model: Optional path to an RNNoise (.rnnn) model. When given, the
+                           arnndn filter replaces afftdn, which is faster and better
+                           tuned for speech. ffmpeg does not bundle these models.
+            output_format: Key of OUTPUT_FORMATS to encode to ('mp3' or 'opus')
+            reuse_compressed: Whether bulk mode probes MP3 inputs and links those already
+                              at the output settings into place instead of encoding
+                              them. Such files skip the crystal clear filters, so
+                              this is off by default.
+        """
+        self.rnnoise_model = rnnoise_model
+        self.reuse_compressed = reuse_compressed
+        if rnnoise_model:
+            self.audio_filters = build_audio_filters(f'arnndn=m={escape_filter_argument(rnnoise_model)}')
+        else:
+            self.audio_filters = AUDIO_FILTERS
+        
+        self.output_format = OUTPUT_FORMATS[output_format]
+        self.output_extension = self.output_format['extension']
+        self.encode_options = COMMON_OPTIONS + self.output_format['options']
+        self.ffmpeg_options = self.encode_options + ['-af', self.audio_filters]
         
-        # Thread lock for thread-safe printing
-        self.print_lock = threading.Lock()
+        # Resolved to an absolute path by check_ffmpeg, saving a PATH lookup per spawn
+        self.ffmpeg_path = 'ffmpeg'
         
-        # Explanation of filters:
-        # highpass=f=80     : Remove low-frequency noise below 80Hz (rumble, AC noise)
-        # afftdn=nf=-25     : Spectral noise reduction with -25dB noise floor
-        # equalizer=f=2500:t=h:w=800:g=2 : Boost 2.5kHz frequency (speech clarity) by 2dB with 800Hz width
+        # Threads each ffmpeg may use for its filtergraph; a single encode gets
+        # every core, bulk_compress lowers this to the cores its workers leave idle
+        self.filter_threads = os.cpu_count() or 1
+    
+    def global_options(self) -> List[str]:
+        """Global ffmpeg options: quiet logging plus the filtergraph thread count"""
+        threads = str(self.filter_threads)
+        return FFMPEG_LOG_OPTIONS + ['-filter_threads', threads, '-filter_complex_threads', threads]
     
     def extract_base_name(self, filename: str) -> str:
         """
         Extract the base name from a filename by removing the number and extension.
         Example: 'BavaBatra46.mp3' -> 'BavaBatra'
         """
-        # Remove the .mp3 extension
-        name_without_ext = filename.replace('.mp3', '').replace('.m4a', '')
+        # Remove the .mp3/.m4a extension
+        name_without_ext = os.path.splitext(filename)[0]
         
         # Use regex to find the text before the number
-        match = re.match(r'([A-Za-z]+)', name_without_ext)
+        match = _BASENAME_RE.match(name_without_ext)
         if match:
             return match.group(1)
         
         # Fallback: just remove numbers from the end
-        return re.sub(r'\d+$', '', name_without_ext)
+        return _TRAILING_DIGITS_RE.sub('', name_without_ext)
     
     def check_ffmpeg(self) -> bool:
-        """Check if ffmpeg is available"""
-        try:
-            result = subprocess.run(['ffmpeg', '-version'], 
-                                  capture_output=True, text=True, check=True)
-            return True
-        except (subprocess.CalledProcessError, FileNotFoundError):
+        """Check if ffmpeg is available, remembering its absolute path for later calls"""
+        ffmpeg_path = shutil.which('ffmpeg')
+        if ffmpeg_path is None:
             return False
+        self.ffmpeg_path = ffmpeg_path
+        return True
     
     def get_audio_info(self, file_path: str) -> Optional[Dict]:
         """Get audio file information using ffprobe"""
         try:
             cmd = [
                 'ffprobe', '-v', 'quiet', '-print_format', 'json',
-                '-show_format', '-show_streams', file_path
+                '-show_entries', 'format=duration:stream=codec_name,sample_rate,channels,bit_rate',
+                file_path
             ]
             result = subprocess.run(cmd, capture_output=True, text=True, check=True)
             return json.loads(result.stdout)
@@ -91,28 +216,24 @@ class CrystalClearCompressor:
         """Format duration in human readable format"""
         if seconds < 60:
             return f"{seconds:.1f}s"
-        elif seconds < 3600:
-            minutes = int(seconds // 60)
-            secs = seconds % 60
-            return f"{minutes}m {secs:.1f}s"
-        else:
-            hours = int(seconds // 3600)
-            minutes = int((seconds % 3600) // 60)
-            secs = seconds % 60
-            return f"{hours}h {minutes}m {secs:.1f}s"
+        minutes, secs = divmod(seconds, 60)
+        if seconds < 3600:
+            return f"{int(minutes)}m {secs:.1f}s"
+        hours, minutes = divmod(int(minutes), 60)
+        return f"{hours}h {minutes}m {secs:.1f}s"
     
     def format_file_size(self, bytes_size: int) -> str:
         """Format file size in human readable format"""
-        if bytes_size < 1024:
+        # Each unit is 2**10 times the previous one, so the bit length picks the unit
+        unit_index = min((bytes_size.bit_length() - 1) // 10, len(_SIZE_UNITS) - 1) if bytes_size > 0 else 0
+        if unit_index == 0:
             return f"{bytes_size} B"
-        elif bytes_size < 1024 * 1024:
-            return f"{bytes_size / 1024:.1f} KB"
-        elif bytes_size < 1024 * 1024 * 1024:
-            return f"{bytes_size / (1024 * 1024):.1f} MB"
-        else:
-            return f"{bytes_size / (1024 * 1024 * 1024):.1f} GB"
+        unit, divisor = _SIZE_UNITS[unit_index]
+        return f"{bytes_size / divisor:.1f} {unit}"
     
-    def compress_audio(self, input_file: str, output_file: str, verbose: bool = True, delete_source: bool = True) -> Tuple[bool, Dict]:
+    def compress_audio(self, input_file: str, output_file: str, verbose: bool = True, delete_source: bool = True,
+                       collect_info: bool = True, create_output_dir: bool = True,
+                       input_size: Optional[int] = None) -> Tuple[bool, Dict]:
         """
         Compress audio file using crystal clear settings
         
@@ -121,22 +242,32 @@ class CrystalClearCompressor:
             output_file: Path to output MP3 file
             verbose: Whether to print progress information
             delete_source: Whether to delete the source file after successful compression
+            collect_info: Whether to run ffprobe on the input and output files for stream details
+            create_output_dir: Whether to create the output directory (bulk_compress creates them up front)
+            input_size: Size of the input file when already known (skips the existence and size checks)
             
         Returns:
             Tuple of (success: bool, info: dict with processing details)
         """
         
-        # Validate input file
-        if not os.path.exists(input_file):
-            return False, {"error": f"Input file not found: {input_file}"}
-        
-        # Check file size
-        input_size = os.path.getsize(input_file)
+        if input_size is None:
+            # Validate input file
+            if not os.path.exists(input_file):
+                return False, {"error": f"Input file not found: {input_file}"}
+            
+            # Check file size
+            input_size = os.path.getsize(input_file)
         if input_size == 0:
             return False, {"error": f"Input file is empty (0 bytes): {input_file}", "skip": True}
         
         # Get input file info
-        input_info = self.get_audio_info(input_file)
+        input_info = self.get_audio_info(input_file) if collect_info else None
+        input_duration = None
+        if input_info and 'format' in input_info:
+            try:
+                input_duration = float(input_info['format']['duration'])
+            except (KeyError, ValueError):
+                pass
         
         if verbose:
             print("🎵 Crystal Clear Audio Compressor")
@@ -150,26 +281,32 @@ class CrystalClearCompressor:
                 print(f"Input format: {stream.get('codec_name', 'unknown')}")
                 print(f"Sample rate: {stream.get('sample_rate', 'unknown')} Hz")
                 print(f"Channels: {stream.get('channels', 'unknown')}")
-                if 'format' in input_info:
-                    duration = input_info['format'].get('duration', 'unknown')
-                    if duration != 'unknown':
-                        print(f"Duration: {self.format_duration(float(duration))}")
+                if input_duration is not None:
+                    print(f"Duration: {self.format_duration(input_duration)}")
             print()
         
         # Create output directory if it doesn't exist
-        output_path = Path(output_file)
-        output_path.parent.mkdir(parents=True, exist_ok=True)
+        if create_output_dir:
+            output_path = Path(output_file)
+            output_path.parent.mkdir(parents=True, exist_ok=True)
         
-        # Build ffmpeg command
-        cmd = ['ffmpeg', '-y', '-i', input_file] + self.ffmpeg_options + [output_file]
+        # Build ffmpeg command, writing to a temporary file next to the output
+        partial_file = output_file + PARTIAL_SUFFIX
+        cmd = [self.ffmpeg_path, '-y'] + self.global_options()
+        if verbose:
+            cmd += ['-progress', 'pipe:1']
+        cmd += ['-i', input_file] + self.ffmpeg_options + [partial_file]
         
         if verbose:
             print("🔧 Processing with crystal clear settings:")
             print("   • Converting to mono")
-            print("   • Variable bitrate (q:a 3) for high quality")
-            print("   • 22050 Hz sample rate (speech optimized)")
+            for line in self.output_format['description']:
+                print(f"   • {line}")
             print("   • High-pass filter (removes low-frequency noise)")
-            print("   • Spectral noise reduction")
+            if self.rnnoise_model:
+                print("   • RNNoise neural noise reduction")
+            else:
+                print("   • Spectral noise reduction")
             print("   • EQ boost at 2.5kHz for speech clarity")
             print()
             print("⚙️  Running ffmpeg...")
@@ -177,13 +314,17 @@ class CrystalClearCompressor:
         # Execute compression
         start_time = time.time()
         try:
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+            if verbose:
+                self.run_ffmpeg_with_progress(cmd, input_duration)
+            else:
+                subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=True)
             processing_time = time.time() - start_time
             
-            # Get output file info
-            if os.path.exists(output_file):
+            # Move the finished file into place and get output file info
+            if os.path.exists(partial_file):
+                os.replace(partial_file, output_file)
                 output_size = os.path.getsize(output_file)
-                output_info = self.get_audio_info(output_file)
+                output_info = self.get_audio_info(output_file) if collect_info else None
                 compression_ratio = input_size / output_size if output_size > 0 else 0
                 
                 info = {
@@ -232,7 +373,9 @@ class CrystalClearCompressor:
                 
         except subprocess.CalledProcessError as e:
             processing_time = time.time() - start_time
-            error_msg = e.stderr if e.stderr else str(e)
+            if os.path.exists(partial_file):
+                os.remove(partial_file)
+            error_msg = e.stderr.strip()[-ERROR_TAIL_CHARS:] if e.stderr else str(e)
             
             if verbose:
                 print("❌ Compression failed!")
@@ -243,93 +386,282 @@ class CrystalClearCompressor:
                 "processing_time": processing_time
             }
     
-    def process_single_file(self, file_info: Tuple[str, str, str, int, int]) -> Dict:
+    def run_ffmpeg_with_progress(self, cmd: List[str], duration: Optional[float] = None) -> None:
         """
-        Process a single file for parallel execution.
+        Run an ffmpeg command that reports with -progress pipe:1, printing live progress.
         
         Args:
-            file_info: Tuple of (input_file, output_file, filename, file_index, total_files)
+            cmd: ffmpeg command line including '-progress pipe:1'
+            duration: Input duration in seconds, used to show a percentage when known
             
+        Raises:
+            subprocess.CalledProcessError: If ffmpeg exits with a non-zero status
+        """
+        position = 0.0
+        speed = 'N/A'
+        # stderr goes to a temporary file rather than a pipe: a damaged input can log
+        # an error per frame, and a full stderr pipe would stall ffmpeg (and this loop)
+        with tempfile.TemporaryFile() as stderr_file:
+            with subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=stderr_file,
+                                  text=True, bufsize=1) as process:
+                for line in process.stdout:
+                    key, _, value = line.strip().partition('=')
+                    if key == 'out_time_us':
+                        try:
+                            position = int(value) / 1_000_000
+                        except ValueError:
+                            pass
+                    elif key == 'speed':
+                        speed = value
+                    elif key == 'progress':
+                        # Each progress block ends with progress=continue or progress=end
+                        status = f"   ⏳ {self.format_duration(position)}"
+                        if duration:
+                            status += f" / {self.format_duration(duration)} ({min(position / duration, 1) * 100:.0f}%)"
+                        print(f"\r{status} at {speed}  ", end='', flush=True)
+            print()
+            
+            # Only the tail of stderr ends up in the error message
+            stderr_file.seek(max(0, stderr_file.tell() - ERROR_TAIL_CHARS * 4))
+            stderr = stderr_file.read().decode(errors='replace')
+        
+        if process.returncode != 0:
+            raise subprocess.CalledProcessError(process.returncode, cmd, stderr=stderr)
+    
+    def compress_batch(self, file_pairs: List[Tuple[str, str, int]]) -> Tuple[bool, Dict]:
+        """
+        Compress several audio files with a single ffmpeg process.
+        
+        Each input gets its own copy of the crystal clear filter chain inside one
+        filtergraph, so ffmpeg startup and filter initialization are paid once per
+        batch instead of once per file.
+        
+        Args:
+            file_pairs: List of (input_file, output_file, input_size) tuples
+            
+        Returns:
+            Tuple of (success: bool, info: dict with per-file details under "files")
+        """
+        cmd = [self.ffmpeg_path, '-y'] + self.global_options()
+        for input_file, _, _ in file_pairs:
+            cmd += ['-i', input_file]
+        
+        filtergraph = ';'.join(f'[{i}:a]{self.audio_filters}[out{i}]' for i in range(len(file_pairs)))
+        cmd += ['-filter_complex', filtergraph]
+        
+        for i, (_, output_file, _) in enumerate(file_pairs):
+            cmd += ['-map', f'[out{i}]'] + self.encode_options + [output_file + PARTIAL_SUFFIX]
+        
+        start_time = time.time()
+        try:
+            subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=True)
+        except subprocess.CalledProcessError as e:
+            # Don't leave partial outputs behind
+            for _, output_file, _ in file_pairs:
+                if os.path.exists(output_file + PARTIAL_SUFFIX):
+                    os.remove(output_file + PARTIAL_SUFFIX)
+            return False, {
+                "error": e.stderr.strip()[-ERROR_TAIL_CHARS:] if e.stderr else str(e),
+                "processing_time": time.time() - start_time
+            }
+        processing_time = time.time() - start_time
+        
+        missing = [output_file for _, output_file, _ in file_pairs
+                   if not os.path.exists(output_file + PARTIAL_SUFFIX)]
+        if missing:
+            for _, output_file, _ in file_pairs:
+                if os.path.exists(output_file + PARTIAL_SUFFIX):
+                    os.remove(output_file + PARTIAL_SUFFIX)
+            return False, {"error": f"Output file was not created: {missing[0]}"}
+        
+        files = []
+        for _, output_file, input_size in file_pairs:
+            os.replace(output_file + PARTIAL_SUFFIX, output_file)
+            output_size = os.path.getsize(output_file)
+            files.append({
+                "success": True,
+                "input_size": input_size,
+                "output_size": output_size,
+                "compression_ratio": input_size / output_size if output_size > 0 else 0,
+                "processing_time": processing_time / len(file_pairs),
+                "output_info": None
+            })
+        
+        return True, {"files": files, "processing_time": processing_time}
+    
+    def write_report(self, lines: List[str]) -> None:
+        """
+        Write one file's report to stdout in a single call.
+        
+        Worker processes share stdout, so building the whole report first keeps
+        each file's lines together (writes up to PIPE_BUF bytes are atomic).
+        """
+        sys.stdout.write('\n'.join(lines) + '\n\n')
+        sys.stdout.flush()
+    
+    def finish_task(self, file_info: FileTask, success: bool, info: Dict) -> Dict:
+        """
+        Report the outcome of a bulk task and delete its source file on success.
+        
         Returns:
             Dictionary with processing results
         """
-        input_file, output_file, filename, file_index, total_files = file_info
-        base_name = self.extract_base_name(filename)
-        
-        # Check if output file already exists
-        if os.path.exists(output_file):
-            with self.print_lock:
-                print(f"[{file_index}/{total_files}] {filename}")
-                print(f"   Base name: {base_name}")
-                print(f"   Output: {base_name}/{os.path.basename(output_file)}")
-                print(f"   ⏭️  Skipped (already exists)")
-                print()
-            return {"status": "skipped", "file": filename}
-        
-        # Check if input file exists and has valid size
-        if not os.path.exists(input_file):
-            with self.print_lock:
-                print(f"[{file_index}/{total_files}] {filename}")
-                print(f"   Base name: {base_name}")
-                print(f"   ❌ Skipped: Input file not found")
-                print()
-            return {"status": "skipped", "file": filename, "error": "Input file not found"}
-        
-        input_size = os.path.getsize(input_file)
-        if input_size == 0:
-            with self.print_lock:
-                print(f"[{file_index}/{total_files}] {filename}")
-                print(f"   Base name: {base_name}")
-                print(f"   ⏭️  Skipped: Empty file (0 bytes)")
-                print()
-            return {"status": "skipped", "file": filename, "error": "Empty file"}
-        
-        # Compress the file
-        success, info = self.compress_audio(input_file, output_file, verbose=False, delete_source=False)
-        
-        with self.print_lock:
-            print(f"[{file_index}/{total_files}] {filename}")
-            print(f"   Base name: {base_name}")
-            print(f"   Output: {base_name}/{os.path.basename(output_file)}")
+        input_file, output_file, filename, base_name, file_index, total_files = file_info[:6]
+        lines = [
+            f"[{file_index}/{total_files}] {filename}",
+            f"   Base name: {base_name}",
+            f"   Output: {base_name}/{os.path.basename(output_file)}",
+        ]
+        
+        if success:
+            if info.get("reused", False):
+                lines.append(f"   ♻️  Already at target settings, reused without re-encoding")
+            else:
+                lines.append(f"   ✅ Compressed successfully!")
+                lines.append(f"   Size: {self.format_file_size(info['input_size'])} → {self.format_file_size(info['output_size'])}")
+                lines.append(f"   Compression: {info['compression_ratio']:.1f}x")
             
-            if success:
-                print(f"   ✅ Compressed successfully!")
-                print(f"   Size: {self.format_file_size(info['input_size'])} → {self.format_file_size(info['output_size'])}")
-                print(f"   Compression: {info['compression_ratio']:.1f}x")
-                
-                # Delete the source file after successful compression
-                try:
-                    if os.path.exists(input_file):
-                        os.remove(input_file)
-                        print(f"   🗑️  Deleted source file")
-                    else:
-                        print(f"   ⚠️  Warning: Source file no longer exists")
-                except OSError as e:
-                    print(f"   ⚠️  Warning: Could not delete source file '{input_file}': {e}")
-                
-                print()
-                return {"status": "success", "file": filename, "info": info}
+            # Delete the source file after successful compression
+            try:
+                os.remove(input_file)
+                lines.append(f"   🗑️  Deleted source file")
+            except FileNotFoundError:
+                lines.append(f"   ⚠️  Warning: Source file no longer exists")
+            except OSError as e:
+                lines.append(f"   ⚠️  Warning: Could not delete source file '{input_file}': {e}")
+            
+            self.write_report(lines)
+            return {"status": "success", "file": filename, "info": info}
+        else:
+            # Check if this is a skippable error (empty file)
+            if info.get("skip", False):
+                lines.append(f"   ⏭️  Skipped: {info.get('error', 'Unknown error')}")
+                self.write_report(lines)
+                return {"status": "skipped", "file": filename, "error": info.get('error', 'Unknown error')}
             else:
-                # Check if this is a skippable error (empty file)
-                if info.get("skip", False):
-                    print(f"   ⏭️  Skipped: {info.get('error', 'Unknown error')}")
-                    print()
-                    return {"status": "skipped", "file": filename, "error": info.get('error', 'Unknown error')}
-                else:
-                    print(f"   ❌ Failed: {info.get('error', 'Unknown error')}")
-                    print(f"   ⏭️  Continuing with next file...")
-                    print()
-                    return {"status": "failed", "file": filename, "error": info.get('error', 'Unknown error')}
+                lines.append(f"   ❌ Failed: {info.get('error', 'Unknown error')}")
+                lines.append(f"   ⏭️  Continuing with next file...")
+                self.write_report(lines)
+                return {"status": "failed", "file": filename, "error": info.get('error', 'Unknown error')}
+    
+    def meets_output_target(self, file_path: str) -> bool:
+        """
+        Check with ffprobe whether a file is already encoded with the output settings.
+        
+        Only files with the output format's extension are probed, so inputs that
+        always need encoding (e.g. M4A) cost no extra subprocess.
+        """
+        target = self.output_format.get('target')
+        if not target or os.path.splitext(file_path)[1] != self.output_extension:
+            return False
+        
+        info = self.get_audio_info(file_path)
+        if not info or not info.get('streams'):
+            return False
+        
+        stream = info['streams'][0]
+        try:
+            return (stream.get('codec_name') == target['codec_name']
+                    and int(stream['channels']) == target['channels']
+                    and int(stream['sample_rate']) == target['sample_rate']
+                    and int(stream['bit_rate']) < target['max_bit_rate'])
+        except (KeyError, ValueError):
+            return False
+    
+    def reuse_if_compressed(self, file_info: FileTask) -> Optional[Dict]:
+        """
+        Link or copy a bulk task's input to its output if it already meets the output settings.
+        
+        Returns:
+            Dictionary with processing results, or None if the file needs encoding
+        """
+        input_file, output_file, input_size = file_info[0], file_info[1], file_info[6]
+        if not self.reuse_compressed or not self.meets_output_target(input_file):
+            return None
+        
+        partial_file = output_file + PARTIAL_SUFFIX
+        try:
+            try:
+                # Output folders live inside the source directory, so a hardlink
+                # usually works and avoids copying the file's contents
+                os.link(input_file, output_file)
+            except OSError:
+                shutil.copyfile(input_file, partial_file)
+                os.replace(partial_file, output_file)
+        except OSError as e:
+            if os.path.exists(partial_file):
+                os.remove(partial_file)
+            return self.finish_task(file_info, False, {"error": f"Could not copy file: {e}"})
+        
+        return self.finish_task(file_info, True, {
+            "success": True,
+            "input_size": input_size,
+            "output_size": input_size,
+            "compression_ratio": 1.0,
+            "processing_time": 0.0,
+            "output_info": None,
+            "reused": True
+        })
     
-    def bulk_compress(self, source_directory: str = None, verbose: bool = True, max_workers: int = 4) -> Dict:
+    def encode_task(self, file_info: FileTask) -> Dict:
+        """Compress a single bulk task with its own ffmpeg process and report the result"""
+        success, info = self.compress_audio(file_info[0], file_info[1], verbose=False, delete_source=False,
+                                           collect_info=False, create_output_dir=False,
+                                           input_size=file_info[6])
+        return self.finish_task(file_info, success, info)
+    
+    def encode_batch(self, batch: List[FileTask]) -> List[Dict]:
+        """
+        Compress bulk tasks with as few ffmpeg processes as possible and report the results.
+        
+        A failed batch (e.g. one corrupt input) is split in half and each half
+        retried, so a bad file is isolated with a logarithmic number of extra
+        ffmpeg runs rather than one run per file in the batch.
+        """
+        if len(batch) == 1:
+            return [self.encode_task(batch[0])]
+        
+        success, info = self.compress_batch([(file_info[0], file_info[1], file_info[6]) for file_info in batch])
+        if success:
+            return [self.finish_task(file_info, True, file_result)
+                    for file_info, file_result in zip(batch, info["files"])]
+        
+        middle = len(batch) // 2
+        return self.encode_batch(batch[:middle]) + self.encode_batch(batch[middle:])
+    
+    def process_batch(self, batch: List[FileTask]) -> List[Dict]:
+        """
+        Process a batch of files with one ffmpeg process for parallel execution.
+        
+        Args:
+            batch: List of FileTask tuples prepared by bulk_compress
+            
+        Returns:
+            List of dictionaries with processing results
+        """
+        results = []
+        pending = []
+        for file_info in batch:
+            result = self.reuse_if_compressed(file_info)
+            if result is not None:
+                results.append(result)
+            else:
+                pending.append(file_info)
+        
+        if pending:
+            results.extend(self.encode_batch(pending))
+        
+        return results
+    
+    def bulk_compress(self, source_directory: str = None, verbose: bool = True, max_workers: Optional[int] = None) -> Dict:
         """
         Process all MP3/M4A files in the source directory and organize them into folders.
-        Uses parallel processing for faster compression.
+        Uses one worker process per CPU core for faster compression.
         
         Args:
             source_directory: Directory containing MP3 files (defaults to current directory)
             verbose: Whether to print progress information
-            max_workers: Number of parallel workers (default: 4)
+            max_workers: Number of parallel worker processes (default: one per CPU core)
             
         Returns:
             Dictionary with processing results
@@ -338,15 +670,53 @@ class CrystalClearCompressor:
             source_directory = os.getcwd()
         
         # Get all audio files
-        audio_files = self.get_mp3_files(source_directory)
+        audio_files = self.scan_audio_files(source_directory)
         
         if not audio_files:
             return {"error": "No MP3 or M4A files found in the directory"}
         
+        # Prepare file info, setting aside files that need no work at all so they
+        # never reach the worker pool
+        file_tasks = []
+        skipped_existing = 0
+        skipped_empty = 0
+        skipped_missing = 0
+        for i, entry in enumerate(audio_files, 1):
+            input_file = entry.path
+            filename = entry.name
+            base_name = self.extract_base_name(filename)
+            
+            # Create output directory path
+            output_dir = os.path.join(source_directory, base_name)
+            output_file = os.path.join(output_dir, os.path.splitext(filename)[0] + self.output_extension)
+            
+            # Stat each path once here (DirEntry caches it) so workers don't repeat the syscalls
+            if os.path.exists(output_file):
+                skipped_existing += 1
+                continue
+            try:
+                input_size = entry.stat().st_size
+            except FileNotFoundError:
+                skipped_missing += 1
+                continue
+            if input_size == 0:
+                skipped_empty += 1
+                continue
+            
+            file_tasks.append((input_file, output_file, filename, base_name, i, len(audio_files),
+                               input_size))
+        
+        cpu_count = os.cpu_count() or 1
+        if max_workers is None:
+            max_workers = min(cpu_count, max(1, len(file_tasks)))
+        
+        # Spread any cores the workers leave idle over each ffmpeg's filtergraph
+        self.filter_threads = max(1, cpu_count // max_workers)
+        
         results = {
             "total_files": len(audio_files),
             "processed": 0,
-            "skipped": 0,
+            "skipped": skipped_existing + skipped_empty + skipped_missing,
             "failed": 0,
             "errors": []
         }
@@ -355,48 +725,69 @@ class CrystalClearCompressor:
             print("🎵 Crystal Clear Bulk Audio Compressor (Parallel Processing)")
             print("=" * 60)
             print(f"Source directory: {source_directory}")
-            print(f"Found {len(audio_files)} audio files to process")
-            print(f"Using {max_workers} parallel workers")
+            print(f"Found {len(audio_files)} audio files, {len(file_tasks)} to process")
+            if results["skipped"]:
+                reasons = [f"{count} {reason}" for count, reason in (
+                    (skipped_existing, "already exist"),
+                    (skipped_empty, "empty (0 bytes)"),
+                    (skipped_missing, "not found"),
+                ) if count]
+                print(f"⏭️  Skipped {results['skipped']} files: {', '.join(reasons)}")
+            print(f"Using {max_workers} parallel workers ({self.filter_threads} filter threads each)")
             print()
         
-        # Prepare file info for parallel processing
-        file_tasks = []
-        for i, input_file in enumerate(audio_files, 1):
-            filename = os.path.basename(input_file)
-            base_name = self.extract_base_name(filename)
-            
-            # Create output directory path
-            output_dir = os.path.join(source_directory, base_name)
-            output_file = os.path.join(output_dir, filename.replace('.m4a', '.mp3'))
-            
-            file_tasks.append((input_file, output_file, filename, i, len(audio_files)))
+        # Create each output folder once; a folder that can't be created fails only its own files
+        dir_errors = {}
+        for output_dir in {os.path.dirname(task[1]) for task in file_tasks}:
+            try:
+                os.makedirs(output_dir, exist_ok=True)
+            except OSError as e:
+                dir_errors[output_dir] = f"Could not create output folder: {e}"
+        
+        if dir_errors:
+            remaining_tasks = []
+            for task in file_tasks:
+                error = dir_errors.get(os.path.dirname(task[1]))
+                if error is None:
+                    remaining_tasks.append(task)
+                    continue
+                results["failed"] += 1
+                results["errors"].append({"file": task[2], "error": error})
+                if verbose:
+                    print(f"   ❌ Failed {task[2]}: {error}")
+            file_tasks = remaining_tasks
         
-        # Process files in parallel
+        # Group files into batches, small enough that every worker gets one
+        batch_size = max(1, min(BATCH_SIZE, len(file_tasks) // max_workers))
+        batches = [file_tasks[i:i + batch_size] for i in range(0, len(file_tasks), batch_size)]
+        
+        # Flush the header so worker reports written to the shared stdout can't overtake it
+        sys.stdout.flush()
+        
+        # Process batches in parallel
         start_time = time.time()
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            # Submit all tasks
-            future_to_file = {executor.submit(self.process_single_file, task): task for task in file_tasks}
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            # Submit all batches (each submission pickles self along with the batch)
+            future_to_batch = {executor.submit(self.process_batch, batch): batch for batch in batches}
             
-            # Process completed tasks
-            for future in as_completed(future_to_file):
+            # Process completed batches
+            for future in as_completed(future_to_batch):
                 try:
-                    result = future.result()
-                    
-                    if result["status"] == "success":
-                        results["processed"] += 1
-                    elif result["status"] == "skipped":
-                        results["skipped"] += 1
-                    elif result["status"] == "failed":
-                        results["failed"] += 1
-                        results["errors"].append({"file": result["file"], "error": result["error"]})
+                    for result in future.result():
+                        if result["status"] == "success":
+                            results["processed"] += 1
+                        elif result["status"] == "skipped":
+                            results["skipped"] += 1
+                        elif result["status"] == "failed":
+                            results["failed"] += 1
+                            results["errors"].append({"file": result["file"], "error": result["error"]})
                 except Exception as e:
-                    # Handle any unexpected errors in the worker thread
-                    task = future_to_file[future]
-                    filename = task[2]  # filename is at index 2 in the tuple
-                    results["failed"] += 1
-                    results["errors"].append({"file": filename, "error": f"Unexpected error: {str(e)}"})
-                    if verbose:
-                        with self.print_lock:
+                    # Handle any unexpected errors in the worker process
+                    for task in future_to_batch[future]:
+                        filename = task[2]  # filename is at index 2 in the tuple
+                        results["failed"] += 1
+                        results["errors"].append({"file": filename, "error": f"Unexpected error: {str(e)}"})
+                        if verbose:
                             print(f"   ❌ Unexpected error processing {filename}: {e}")
                             print(f"   ⏭️  Continuing with next file...")
         
@@ -419,11 +810,18 @@ class CrystalClearCompressor:
         
         return results
     
+    def scan_audio_files(self, directory: str) -> List[os.DirEntry]:
+        """Get directory entries for all MP3 and M4A files in the directory in a single scan"""
+        with os.scandir(directory) as entries:
+            # Hidden files are excluded, matching the previous glob behavior
+            return [entry for entry in entries
+                    if entry.name.endswith(('.mp3', '.m4a'))
+                    and not entry.name.startswith('.')
+                    and entry.is_file()]
+    
     def get_mp3_files(self, directory: str) -> List[str]:
         """Get all MP3 and M4A files in the directory"""
-        mp3_files = glob.glob(os.path.join(directory, "*.mp3"))
-        m4a_files = glob.glob(os.path.join(directory, "*.m4a"))
-        return mp3_files + m4a_files
+        return [entry.path for entry in self.scan_audio_files(directory)]
 
 def main():
     """Main function with command line interface"""
@@ -435,6 +833,7 @@ Examples:
   python3 crystal_clear_compressor.py input.wav output.mp3
   python3 crystal_clear_compressor.py recording.m4a compressed.mp3
   python3 crystal_clear_compressor.py --quiet input.wav output.mp3
+  python3 crystal_clear_compressor.py --format opus input.wav output.opus
   python3 crystal_clear_compressor.py --bulk-compress
 
 Audio Processing Details:
@@ -443,15 +842,21 @@ Audio Processing Details:
   • 22050 Hz sample rate (ideal for voice)
   • High-pass filter removes low-frequency noise
   • Spectral noise reduction for cleaner audio
+    (use --rnnoise-model FILE.rnnn for faster RNNoise denoising)
   • EQ boost at 2.5kHz enhances speech clarity
+  • --format opus encodes 24 kbps Opus instead (much smaller, faster to encode,
+    but the web player and build scripts currently expect .mp3)
 
 Bulk Processing:
   • Processes all MP3/M4A files in current directory
-  • Uses parallel processing (4 workers by default)
+  • Uses parallel processing (one worker process per CPU core by default)
   • Organizes output into folders based on base name
   • Example: BavaBatra46.mp3 → BavaBatra/BavaBatra46.mp3
   • Skips files that already exist in output folders
-  • Use --workers N to control parallel processing (1-8 workers)
+  • --reuse moves MP3 inputs already mono, 22050 Hz and under 220 kbps into
+    their folder without re-encoding (one ffprobe per MP3 input); such files
+    do NOT get the crystal clear filters
+  • Use --workers N to control the number of worker processes
 
 Typical Results:
   • File size reduction: 80-90%
@@ -460,21 +865,32 @@ Typical Results:
         """)
     
     parser.add_argument('input_file', nargs='?', help='Input audio file path')
-    parser.add_argument('output_file', nargs='?', help='Output MP3 file path')
+    parser.add_argument('output_file', nargs='?', help='Output audio file path (.mp3, or .opus with --format opus)')
     parser.add_argument('-q', '--quiet', action='store_true', 
                        help='Quiet mode - minimal output')
     parser.add_argument('--bulk-compress', action='store_true',
                        help='Process all MP3/M4A files in current directory')
     parser.add_argument('--source-dir', default=None,
                        help='Source directory for bulk compression (defaults to current directory)')
-    parser.add_argument('--workers', type=int, default=4,
-                       help='Number of parallel workers for bulk compression (default: 4)')
+    parser.add_argument('--workers', type=int, default=None,
+                       help='Number of parallel worker processes for bulk compression (default: CPU count)')
+    parser.add_argument('--rnnoise-model', default=None,
+                       help='RNNoise model file (.rnnn) to denoise with arnndn instead of afftdn')
+    parser.add_argument('--reuse', action='store_true',
+                       help='Reuse MP3 inputs that already match the output settings without encoding (skips the filters)')
+    parser.add_argument('--format', choices=sorted(OUTPUT_FORMATS), default='mp3',
+                       help='Output format (default: mp3)')
     parser.add_argument('--version', action='version', version='Crystal Clear Compressor 1.0')
     
     args = parser.parse_args()
     
     # Initialize compressor
-    compressor = CrystalClearCompressor()
+    if args.rnnoise_model and not os.path.isfile(args.rnnoise_model):
+        print(f"❌ Error: RNNoise model '{args.rnnoise_model}' not found!")
+        sys.exit(1)
+    
+    compressor = CrystalClearCompressor(rnnoise_model=args.rnnoise_model, output_format=args.format,
+                                        reuse_compressed=args.reuse)
     
     # Check ffmpeg availability
     if not compressor.check_ffmpeg():
@@ -491,8 +907,8 @@ Typical Results:
         verbose = not args.quiet
         max_workers = args.workers
         
-        if max_workers < 1 or max_workers > 8:
-            print("❌ Error: Number of workers must be between 1 and 8")
+        if max_workers is not None and max_workers < 1:
+            print("❌ Error: Number of workers must be at least 1")
             sys.exit(1)
         
         results = compressor.bulk_compress(source_dir, verbose, max_workers)
@@ -519,15 +935,15 @@ Typical Results:
         print(f"❌ Error: Input file '{input_file}' not found!")
         sys.exit(1)
     
-    # Ensure output has .mp3 extension
-    if not output_file.lower().endswith('.mp3'):
-        print("⚠️  Warning: Output file should have .mp3 extension")
+    # Ensure output has the extension of the chosen format
+    if not output_file.lower().endswith(compressor.output_extension):
+        print(f"⚠️  Warning: Output file should have {compressor.output_extension} extension")
         response = input("Continue anyway? (y/N): ")
         if response.lower() != 'y':
             sys.exit(0)
     
     # Perform compression
-    success, info = compressor.compress_audio(input_file, output_file, verbose)
+    success, info = compressor.compress_audio(input_file, output_file, verbose, collect_info=verbose)
     
     if success:
         if not verbose: